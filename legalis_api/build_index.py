@@ -0,0 +1,197 @@
+import os
+import json
+import glob
+import zipfile
+import hashlib
+import logging
+import argparse
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModel
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default paths, relative to legalis_api/ and overridable the same way as in the API itself
+legalis_model_path = os.getenv("LEGALIS_MODEL_PATH", "../legalis_model")
+cases_path = os.getenv("LEGALIS_CASES_PATH", "../Data/finalcases.json")
+index_path = os.getenv("LEGALIS_INDEX_PATH", "../Data/legalis_index")  # writes legalis_index.json + legalis_index.npz
+
+# Cases whose description embeddings are at least this similar are treated as near-duplicates
+cluster_threshold = float(os.getenv("LEGALIS_CLUSTER_THRESHOLD", "0.98"))
+
+# Function to encode many texts in batches (mean pooling over non-padding tokens only,
+# so each row matches what a single unpadded encode gives for the same text)
+def encode_texts(texts, tokenizer, model, batch_size=32):
+    if not texts:
+        return np.empty((0, model.config.hidden_size), dtype=np.float32)
+    chunks = []
+    for start in range(0, len(texts), batch_size):
+        inputs = tokenizer(texts[start:start + batch_size], return_tensors="pt", truncation=True, padding=True, max_length=512)
+        with torch.no_grad():
+            outputs = model(**inputs)
+        mask = inputs["attention_mask"].unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+        pooled = (outputs.last_hidden_state * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        chunks.append(pooled.numpy())
+    return np.vstack(chunks)
+
+# Function to L2-normalise rows so cosine similarity becomes a plain dot product
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+# Function to hash the source corpus so a stale index can be detected
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Function to identify the encoder an index was built with: its hidden size plus a hash of
+# config.json and the weight files, so a retrained or swapped model invalidates the index
+def encoder_fingerprint(model_path, model):
+    digest = hashlib.sha256()
+    if os.path.isdir(model_path):
+        files = [os.path.join(model_path, "config.json")]
+        files += sorted(glob.glob(os.path.join(model_path, "*.safetensors")) + glob.glob(os.path.join(model_path, "*.bin")))
+        for path in files:
+            if os.path.exists(path):
+                digest.update(os.path.basename(path).encode())
+                digest.update(file_sha256(path).encode())
+    else:
+        digest.update(model_path.encode())
+        digest.update(model.config.to_json_string().encode())
+    return f"{model.config.hidden_size}:{digest.hexdigest()}"
+
+# Function to replace each case's inline sections with ids into a shared table of distinct sections
+def dedupe_sections(cases_data):
+    section_table = []
+    section_ids = {}
+    cases = []
+    for case in cases_data:
+        ids = []
+        for section in case["sections"]:
+            key = json.dumps(section, sort_keys=True)
+            if key not in section_ids:
+                section_ids[key] = len(section_table)
+                section_table.append(section)
+            ids.append(section_ids[key])
+        case = {k: v for k, v in case.items() if k != "sections"}
+        case["section_ids"] = ids
+        cases.append(case)
+    return cases, section_table
+
+# Function to group near-duplicate cases. Each case joins the first representative it is at least
+# `threshold` similar to, otherwise it becomes a new representative (rows must be normalised).
+def cluster_cases(case_matrix, threshold):
+    representatives = []
+    case_clusters = np.empty(len(case_matrix), dtype=np.int64)
+    for index, vector in enumerate(case_matrix):
+        if representatives:
+            similarities = case_matrix[representatives] @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= threshold:
+                case_clusters[index] = best
+                continue
+        case_clusters[index] = len(representatives)
+        representatives.append(index)
+    return case_clusters, np.array(representatives, dtype=np.int64)
+
+# Function to pick k diverse results with maximal marginal relevance. relevance and the rows of
+# vectors (normalised, dense or sparse) are aligned with candidates. The first candidate is kept
+# as-is, so the caller's ordering (e.g. re-ranking) decides the top result.
+def mmr_select(candidates, relevance, vectors, k, lam=0.7):
+    relevance = np.asarray(relevance, dtype=np.float64)
+    remaining = list(range(len(candidates)))
+    selected = []
+    while remaining and len(selected) < k:
+        if selected:
+            redundancy = vectors[remaining] @ vectors[selected].T
+            if hasattr(redundancy, "toarray"):
+                redundancy = redundancy.toarray()
+            scores = lam * relevance[remaining] - (1 - lam) * redundancy.max(axis=1)
+            best = remaining[int(np.argmax(scores))]
+        else:
+            best = remaining[0]
+        selected.append(best)
+        remaining.remove(best)
+    return [candidates[i] for i in selected]
+
+# Function to build the full case index: shared section table, embeddings and near-duplicate clusters
+def build_index(cases_data, tokenizer, model, threshold=cluster_threshold, source_sha256=None, encoder=None):
+    cases, section_table = dedupe_sections(cases_data)
+    case_matrix = normalize_rows(encode_texts([case["case_description"] for case in cases], tokenizer, model))
+    section_matrix = normalize_rows(encode_texts([section["section_description"] for section in section_table], tokenizer, model))
+    case_clusters, representatives = cluster_cases(case_matrix, threshold)
+
+    logger.info(
+        f"Built index: {len(cases)} cases in {len(representatives)} clusters, "
+        f"{sum(len(case['section_ids']) for case in cases)} section references to {len(section_table)} distinct sections."
+    )
+    return {
+        "source_sha256": source_sha256,
+        "encoder_fingerprint": encoder,
+        "cluster_threshold": threshold,
+        "cases": cases,
+        "sections": section_table,
+        "case_clusters": case_clusters,
+        "representatives": representatives,
+        "case_matrix": case_matrix.astype(np.float32),
+        "section_matrix": section_matrix.astype(np.float32)
+    }
+
+# Function to write the index as a JSON table file plus an .npz of the arrays
+def save_index(index, path):
+    arrays = ["case_clusters", "representatives", "case_matrix", "section_matrix"]
+    with open(path + ".json", 'w', encoding='utf-8') as f:
+        json.dump({k: v for k, v in index.items() if k not in arrays}, f, ensure_ascii=False)
+    np.savez(path + ".npz", **{k: index[k] for k in arrays})
+
+# Function to load a saved index, returning None if it is missing, unreadable, or was built from a
+# different corpus, encoder or cluster threshold than the ones given
+def load_index(path, source_sha256=None, encoder=None, threshold=None):
+    try:
+        with open(path + ".json", 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        with np.load(path + ".npz") as arrays:
+            index.update({k: arrays[k] for k in arrays.files})
+        if len(index["case_matrix"]) != len(index["cases"]) or len(index["section_matrix"]) != len(index["sections"]):
+            raise ValueError("embedding rows do not match the case/section tables")
+        if len(index["case_clusters"]) != len(index["cases"]):
+            raise ValueError("cluster assignments do not match the case table")
+        if len(index["representatives"]) and index["representatives"].max() >= len(index["cases"]):
+            raise ValueError("cluster representatives point outside the case table")
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        logger.warning(f"Case index is unreadable ({e}), ignoring it.")
+        return None
+    if source_sha256 is not None and index.get("source_sha256") != source_sha256:
+        logger.warning("Case index is stale (corpus has changed), ignoring it.")
+        return None
+    if encoder is not None and index.get("encoder_fingerprint") != encoder:
+        logger.warning("Case index was built with a different encoder, ignoring it.")
+        return None
+    if threshold is not None and index.get("cluster_threshold") != threshold:
+        logger.warning("Case index was built with a different cluster threshold, ignoring it.")
+        return None
+    return index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the deduplicated, clustered Legalis case index.")
+    parser.add_argument("--model", default=legalis_model_path)
+    parser.add_argument("--cases", default=cases_path)
+    parser.add_argument("--output", default=index_path)
+    parser.add_argument("--threshold", type=float, default=cluster_threshold)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModel.from_pretrained(args.model)
+    with open(args.cases, 'r', encoding='utf-8') as f:
+        cases_data = json.load(f)
+
+    index = build_index(cases_data, tokenizer, model, args.threshold, file_sha256(args.cases), encoder_fingerprint(args.model, model))
+    save_index(index, args.output)
+    logger.info(f"Index written to {args.output}.json / {args.output}.npz")
@@ -0,0 +1,210 @@
+import os
+import sys
+import math
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import subprocess
+import httpx
+import psutil
+from make_standin import standin_env, make_queries
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+# httpx logs every request at INFO, which would bury the report on long runs
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Load and soak harness for /predict/.
+#
+# Each serving configuration ("label:KEY=VALUE,KEY=VALUE", e.g. "rerank:LEGALIS_RERANK_BUDGET_MS=500")
+# is started as its own uvicorn process with those environment variables on top of the stand-in
+# from make_standin.py, then driven at each load level in turn. The WORKERS key sets uvicorn --workers.
+# Levels are requests per second in --mode rps (open loop) or in-flight clients in --mode concurrency
+# (closed loop). A run with a single long level is a soak test; RSS is sampled throughout.
+#
+#   python make_standin.py --reranker
+#   python loadtest.py --config base: --config rerank:LEGALIS_RERANK_BUDGET_MS=500 --levels 1,2,4,8 --duration 60
+#   python loadtest.py --url http://127.0.0.1:8000 --pid <server pid> --levels 4 --duration 3600
+
+# Function to compute the p-th percentile (0-100) of a list of numbers by nearest rank
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p * len(ordered) / 100) - 1))]
+
+# Function to parse "label:KEY=VALUE,KEY=VALUE" into (label, env dict)
+def parse_config(spec):
+    label, _, pairs = spec.partition(":")
+    env = {}
+    for pair in filter(None, pairs.split(",")):
+        key, _, value = pair.partition("=")
+        env[key.strip()] = value.strip()
+    return label or "default", env
+
+# Function to send one request and record its outcome
+async def send_request(client, url, queries, model_mix, timeout, latencies, errors):
+    payload = {
+        "text": random.choice(queries),
+        "model_choice": "legalis" if random.random() < model_mix else "faq"
+    }
+    started = time.perf_counter()
+    try:
+        response = await client.post(url + "/predict/", json=payload, timeout=timeout)
+    except httpx.HTTPError as e:
+        errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+        return
+    if response.status_code == 200:
+        latencies.append(time.perf_counter() - started)
+    else:
+        errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+
+# Function to drive the API at a fixed arrival rate (open loop: slow responses do not slow arrivals)
+async def run_rps(client, url, rate, duration, queries, model_mix, timeout, latencies, errors):
+    tasks = []
+    started = time.perf_counter()
+    for i in range(int(rate * duration)):
+        delay = started + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send_request(client, url, queries, model_mix, timeout, latencies, errors)))
+    await asyncio.gather(*tasks)
+
+# Function to drive the API with a fixed number of clients (closed loop: each waits for its response)
+async def run_concurrency(client, url, concurrency, duration, queries, model_mix, timeout, latencies, errors):
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await send_request(client, url, queries, model_mix, timeout, latencies, errors)
+
+    await asyncio.gather(*(worker() for _ in range(int(concurrency))))
+
+# Function to sample total RSS (server process and its workers) every `interval` seconds
+async def sample_rss(pid, samples, interval=1.0):
+    process = psutil.Process(pid)
+    while True:
+        try:
+            rss = process.memory_info().rss + sum(child.memory_info().rss for child in process.children(recursive=True))
+        except psutil.Error:
+            return
+        samples.append((time.perf_counter(), rss))
+        await asyncio.sleep(interval)
+
+# Function to run one load level and summarise latency, errors and memory
+async def run_level(url, mode, level, duration, queries, model_mix, timeout, pid):
+    latencies, errors, rss_samples = [], {}, []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(limits=limits) as client:
+        sampler = asyncio.create_task(sample_rss(pid, rss_samples)) if pid else None
+        started = time.perf_counter()
+        if mode == "rps":
+            await run_rps(client, url, level, duration, queries, model_mix, timeout, latencies, errors)
+        else:
+            await run_concurrency(client, url, level, duration, queries, model_mix, timeout, latencies, errors)
+        elapsed = time.perf_counter() - started
+        if sampler:
+            sampler.cancel()
+
+    total = len(latencies) + sum(errors.values())
+    result = {
+        "level": level,
+        "requests": total,
+        "achieved_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "error_rate": sum(errors.values()) / total if total else 0.0,
+        "errors": errors
+    }
+    for p in (50, 90, 95, 99):
+        value = percentile(latencies, p)
+        result[f"p{p}_ms"] = value * 1000 if value is not None else None
+    if rss_samples:
+        result["rss_start_mb"] = rss_samples[0][1] / 2**20
+        result["rss_end_mb"] = rss_samples[-1][1] / 2**20
+        result["rss_max_mb"] = max(rss for _, rss in rss_samples) / 2**20
+        hours = (rss_samples[-1][0] - rss_samples[0][0]) / 3600
+        result["rss_growth_mb_per_hour"] = (result["rss_end_mb"] - result["rss_start_mb"]) / hours if hours else 0.0
+    return result
+
+# Function to start the API under uvicorn with a serving configuration and wait until it answers
+def start_server(env, port, ready_timeout):
+    env = dict(env)
+    workers = env.pop("WORKERS", "1")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", workers, "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, **env}
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + ready_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited during startup with code {process.returncode}")
+        try:
+            if httpx.get(url + "/", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Server did not become ready in time")
+
+# Function to print a saturation curve as a table
+def print_curve(label, mode, curve):
+    print(f"\n[{label}] {mode}")
+    print(f"{'level':>8} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'rss MB':>8}")
+    for row in curve:
+        fmt = lambda v: f"{v:9.1f}" if v is not None else f"{'-':>9}"
+        rss = f"{row['rss_max_mb']:8.1f}" if "rss_max_mb" in row else f"{'-':>8}"
+        print(f"{row['level']:>8} {row['achieved_rps']:8.2f} {fmt(row['p50_ms'])} {fmt(row['p95_ms'])} {fmt(row['p99_ms'])} {row['error_rate']:7.1%} {rss}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test /predict/ and build saturation curves per serving configuration.")
+    parser.add_argument("--url", help="test an already running server instead of starting one per --config")
+    parser.add_argument("--pid", type=int, help="server pid for RSS sampling when using --url")
+    parser.add_argument("--config", action="append", default=[], help="serving configuration 'label:KEY=VALUE,...' (repeatable)")
+    parser.add_argument("--standin", default="../standin", help="stand-in directory from make_standin.py")
+    parser.add_argument("--mode", choices=["rps", "concurrency"], default="rps")
+    parser.add_argument("--levels", default="1,2,4,8", help="comma separated RPS or concurrency levels")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per level")
+    parser.add_argument("--model-mix", type=float, default=0.5, help="share of requests using the legalis model")
+    parser.add_argument("--queries", type=int, default=200, help="distinct synthetic queries to draw from")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ready-timeout", type=float, default=600)
+    parser.add_argument("--output", help="write the full report as JSON")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    queries = make_queries(random.Random(args.seed), args.queries)
+    levels = [float(level) for level in args.levels.split(",")]
+
+    report = {}
+    if args.url:
+        report["external"] = [
+            asyncio.run(run_level(args.url.rstrip("/"), args.mode, level, args.duration, queries, args.model_mix, args.timeout, args.pid))
+            for level in levels
+        ]
+        print_curve("external", args.mode, report["external"])
+    else:
+        for spec in args.config or ["default:"]:
+            label, env = parse_config(spec)
+            process, url = start_server({**standin_env(args.standin), **env}, args.port, args.ready_timeout)
+            try:
+                curve = []
+                for level in levels:
+                    logger.info(f"[{label}] running {args.mode} level {level} for {args.duration}s")
+                    curve.append(asyncio.run(run_level(url, args.mode, level, args.duration, queries, args.model_mix, args.timeout, process.pid)))
+                report[label] = curve
+                print_curve(label, args.mode, curve)
+            finally:
+                process.terminate()
+                process.wait()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -1,13 +1,21 @@
+import os
+import time
 import json
+import random
+import asyncio
+import threading
+from collections import OrderedDict, deque
 import jsonlines
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 import torch
-from transformers import AutoTokenizer, AutoModel
+from transformers import AutoTokenizer, AutoModel, AutoModelForSequenceClassification
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.feature_extraction.text import TfidfVectorizer
 import logging
 from typing import List
+from build_index import encode_texts, normalize_rows, file_sha256, encoder_fingerprint, build_index, load_index, mmr_select, cluster_threshold
 from pydantic import BaseModel, Field
 
 # Initialize FastAPI app
@@ -18,8 +26,36 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Paths to your models
-legalis_model_path = "../legalis_model"
-faq_model_path = "../faq_model"
+legalis_model_path = os.getenv("LEGALIS_MODEL_PATH", "../legalis_model")
+faq_model_path = os.getenv("FAQ_MODEL_PATH", "../faq_model")
+cases_path = os.getenv("LEGALIS_CASES_PATH", "../Data/finalcases.json")
+faq_path = os.getenv("FAQ_DATA_PATH", "../Data/QandA.jsonl")
+# Prebuilt case index from build_index.py (legalis_index.json + legalis_index.npz)
+index_path = os.getenv("LEGALIS_INDEX_PATH", "../Data/legalis_index")
+# Cross-encoder re-ranker: InLegalBERT fine-tuned on (query, case/section) pairs with a single relevance logit
+# (see train_reranker.py)
+reranker_model_path = os.getenv("LEGALIS_RERANKER_PATH", "../reranker_model")
+
+# Two-stage retrieval settings
+shortlist_size = int(os.getenv("LEGALIS_SHORTLIST_SIZE", "100"))  # cases kept by the bi-encoder stage
+rerank_batch_size = int(os.getenv("LEGALIS_RERANK_BATCH_SIZE", "16"))  # (query, passage) pairs per forward pass
+rerank_budget_ms = float(os.getenv("LEGALIS_RERANK_BUDGET_MS", "1500"))  # per-request re-ranking time budget
+
+# Diverse (MMR) result settings, used when a request sets `diverse`
+mmr_pool_size = int(os.getenv("LEGALIS_MMR_POOL_SIZE", "20"))  # top re-ranked candidates MMR chooses from
+mmr_lambda = float(os.getenv("LEGALIS_MMR_LAMBDA", "0.7"))  # 1.0 = pure relevance, 0.0 = pure diversity
+
+# Semantic FAQ cache settings
+faq_cache_size = int(os.getenv("LEGALIS_FAQ_CACHE_SIZE", "1024"))  # max cached query embeddings
+faq_cache_threshold = float(os.getenv("LEGALIS_FAQ_CACHE_THRESHOLD", "0.97"))  # min cosine for a cache hit
+faq_cache_audit_rate = float(os.getenv("LEGALIS_FAQ_CACHE_AUDIT_RATE", "0.05"))  # share of hits re-checked against the corpus
+
+# Admission control and overload settings
+max_concurrency = int(os.getenv("LEGALIS_MAX_CONCURRENCY", "2"))  # requests doing model work at once
+max_queue = int(os.getenv("LEGALIS_MAX_QUEUE", "8"))  # requests allowed to wait for a slot before 429s
+request_timeout_ms = float(os.getenv("LEGALIS_REQUEST_TIMEOUT_MS", "10000"))  # per-request deadline, queueing included
+degrade_p95_ms = float(os.getenv("LEGALIS_DEGRADE_P95_MS", "3000"))  # recent p95 above this switches to degraded mode
+latency_window = int(os.getenv("LEGALIS_LATENCY_WINDOW", "100"))  # completed requests the p95 is computed over
 
 # Load tokenizers and models for both Legalis and FAQ
 tokenizer_legalis = AutoTokenizer.from_pretrained(legalis_model_path)
@@ -28,9 +64,19 @@ model_legalis = AutoModel.from_pretrained(legalis_model_path)
 tokenizer_faq = AutoTokenizer.from_pretrained(faq_model_path)
 model_faq = AutoModel.from_pretrained(faq_model_path)
 
+# Load the cross-encoder re-ranker if it is available, otherwise keep bi-encoder ordering
+try:
+    tokenizer_reranker = AutoTokenizer.from_pretrained(reranker_model_path)
+    model_reranker = AutoModelForSequenceClassification.from_pretrained(reranker_model_path, num_labels=1)
+    model_reranker.eval()
+except (OSError, ValueError):
+    logger.warning("Re-ranker model not found, results will use bi-encoder ordering only.")
+    tokenizer_reranker = None
+    model_reranker = None
+
 # Load Legalis Data from JSON
 try:
-    with open('../Data/finalcases.json', 'r') as f:
+    with open(cases_path, 'r') as f:
         cases_data = json.load(f)  # This assumes the JSON is an array of case objects.
 except FileNotFoundError:
     logger.error("Legalis data file not found.")
@@ -39,7 +85,7 @@ except FileNotFoundError:
 # Load FAQ Data from JSONL
 faq_data = []
 try:
-    with jsonlines.open('../Data/QandA.jsonl') as reader:
+    with jsonlines.open(faq_path) as reader:
         for obj in reader:
             faq_data.append(obj)
 except FileNotFoundError:
@@ -49,6 +95,7 @@ except FileNotFoundError:
 class TextRequest(BaseModel):
     text: str
     model_choice: str = Field(..., pattern="^(legalis|faq)$", example="legalis")
+    diverse: bool = False  # Legalis only: spread results across dissimilar cases (MMR)
 
 # Function to encode text for both models
 def encode_text(text, tokenizer, model):
@@ -57,54 +104,263 @@ def encode_text(text, tokenizer, model):
         outputs = model(**inputs)
     return outputs.last_hidden_state.mean(dim=1).numpy()
 
-# Function to find relevant cases (Legalis) with most similar sections
-def find_relevant_cases(user_input, cases_data, num_results=5):
-    input_vector = encode_text(user_input, tokenizer_legalis, model_legalis)
-    case_vectors = [encode_text(case["case_description"], tokenizer_legalis, model_legalis) for case in cases_data]
-    
-    similarities = [cosine_similarity(input_vector, case_vec.reshape(1, -1))[0][0] for case_vec in case_vectors]
-    
-    # Get top N cases with highest similarity scores
-    top_indices = np.argsort(similarities)[-num_results:][::-1]
-    
+# Load the prebuilt case index, or build it in memory when it is missing or stale.
+# Identical sections are stored once and referenced by id; near-duplicate cases are clustered
+# and only one representative per cluster is searched.
+legalis_encoder = encoder_fingerprint(legalis_model_path, model_legalis)
+legalis_index = load_index(index_path, file_sha256(cases_path), legalis_encoder, cluster_threshold) if cases_data else None
+if legalis_index is None:
+    if cases_data:
+        logger.warning("No up-to-date case index found, building it in memory (run build_index.py to persist it).")
+    legalis_index = build_index(cases_data, tokenizer_legalis, model_legalis, cluster_threshold, encoder=legalis_encoder)
+cases_data = legalis_index["cases"]
+section_table = legalis_index["sections"]
+case_matrix = legalis_index["case_matrix"]
+section_matrix = legalis_index["section_matrix"]
+case_clusters = legalis_index["case_clusters"]
+representatives = legalis_index["representatives"]
+representative_matrix = case_matrix[representatives]
+cluster_members = [[] for _ in representatives]
+for case_index, cluster in enumerate(case_clusters):
+    cluster_members[cluster].append(case_index)
+
+# Precompute FAQ prompt embeddings once at startup
+faq_matrix = normalize_rows(encode_texts([faq["prompt"] for faq in faq_data], tokenizer_faq, model_faq))
+
+# Lexical (TF-IDF) indexes used in degraded mode, when there is no time for BERT encoding.
+# Rows are L2-normalised, so a sparse dot product is the cosine similarity.
+lexical_cases = TfidfVectorizer().fit([case["case_description"] for case in cases_data] + [section["section_description"] for section in section_table]) if cases_data else None
+lexical_representative_matrix = lexical_cases.transform([cases_data[i]["case_description"] for i in representatives]) if cases_data else None
+lexical_section_matrix = lexical_cases.transform([section["section_description"] for section in section_table]) if cases_data else None
+lexical_faq = TfidfVectorizer().fit([faq["prompt"] for faq in faq_data]) if faq_data else None
+lexical_faq_matrix = lexical_faq.transform([faq["prompt"] for faq in faq_data]) if faq_data else None
+
+# Raised by search functions once a request's deadline has passed
+class DeadlineExceeded(Exception):
+    pass
+
+# Function to tell whether a request's deadline has passed
+def deadline_passed(deadline):
+    return deadline is not None and time.perf_counter() > deadline
+
+# Function to stop work on a request whose deadline has passed
+def check_deadline(deadline):
+    if deadline_passed(deadline):
+        raise DeadlineExceeded()
+
+# Semantic cache of recent queries, keyed by their normalised embedding rather than the exact text,
+# so paraphrases of an earlier question reuse its results. The index is a fixed-size matrix searched
+# with one dot product, which is exact nearest-neighbour and cheap at this size. Least recently
+# used entries are evicted first.
+class SemanticCache:
+    def __init__(self, capacity, dim, threshold):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.entries = OrderedDict()  # slot -> (query text, num_results asked for, results), in LRU order
+        self.lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.audits = 0
+        self.false_hits = 0
+        self.evictions = 0
+
+    # Returns (results, similarity) for the nearest cached query, with results None on a miss.
+    # Entries computed for fewer than num_results results cannot answer the query and are skipped.
+    def lookup(self, vector, num_results):
+        with self.lock:
+            self.lookups += 1
+            slots = np.array([slot for slot, (_, cached_num_results, _) in self.entries.items() if cached_num_results >= num_results], dtype=np.int64)
+            if not len(slots):
+                return None, 0.0
+            similarities = self.vectors[slots] @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None, float(similarities[best])
+            slot = int(slots[best])
+            self.entries.move_to_end(slot)
+            self.hits += 1
+            return self.entries[slot][2][:num_results], float(similarities[best])
+
+    def store(self, vector, query, num_results, results):
+        with self.lock:
+            if self.capacity <= 0:
+                return
+            if len(self.entries) < self.capacity:
+                slot = len(self.entries)
+            else:
+                slot, _ = self.entries.popitem(last=False)
+                self.evictions += 1
+            self.vectors[slot] = vector
+            self.entries[slot] = (query, num_results, results)
+
+    def record_audit(self, false_hit):
+        with self.lock:
+            self.audits += 1
+            if false_hit:
+                self.false_hits += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "capacity": self.capacity,
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "audited_hits": self.audits,
+                "false_hits": self.false_hits,
+                "false_hit_rate": self.false_hits / self.audits if self.audits else 0.0,
+                "evictions": self.evictions
+            }
+
+faq_cache = SemanticCache(faq_cache_size, faq_matrix.shape[1], faq_cache_threshold)
+
+# Running estimate of cross-encoder cost per (query + passage) token in seconds. Counting tokens
+# rather than pairs keeps long case descriptions and short sections on the same scale.
+# It grows when the CPU is contended, which shrinks the shortlist we can afford.
+rerank_seconds_per_token = None
+rerank_cost_lock = threading.Lock()
+
+# Function to score (query, passage) pairs with the cross-encoder in batches until the deadline.
+# Each batch is tokenized only once the deadline has been checked, then cut down to the pairs the
+# remaining time is expected to cover, so tokenization is charged to the budget as well.
+# Returns scores for a prefix of passages; the prefix is shorter than passages when time runs out.
+def rerank_scores(query, passages, deadline):
+    global rerank_seconds_per_token
+    scores = []
+    if model_reranker is None:
+        return scores
+
+    for start in range(0, len(passages), rerank_batch_size):
+        if deadline_passed(deadline):
+            break
+        batch = passages[start:start + rerank_batch_size]
+        encodings = tokenizer_reranker([query] * len(batch), batch, truncation=True, max_length=512)
+        with rerank_cost_lock:
+            seconds_per_token = rerank_seconds_per_token
+        count = len(batch)
+        if seconds_per_token:
+            lengths = [len(ids) for ids in encodings["input_ids"]]
+            count = int(np.searchsorted(np.cumsum(lengths) * seconds_per_token, deadline - time.perf_counter(), side="right"))
+            if count == 0:
+                break
+        inputs = tokenizer_reranker.pad({key: values[:count] for key, values in encodings.items()}, return_tensors="pt")
+        tokens = int(inputs["attention_mask"].sum())
+        started = time.perf_counter()
+        with torch.no_grad():
+            logits = model_reranker(**inputs).logits
+        scores.extend(logits[:, 0].tolist())
+        cost = (time.perf_counter() - started) / tokens
+        with rerank_cost_lock:
+            rerank_seconds_per_token = cost if rerank_seconds_per_token is None else 0.8 * rerank_seconds_per_token + 0.2 * cost
+        if count < len(batch):
+            break
+    return scores
+
+# Function to order candidate indices: cross-encoder scored prefix first (best first),
+# then the unscored remainder in its original bi-encoder order
+def rerank_order(candidates, scores):
+    scored = sorted(zip(candidates[:len(scores)], scores), key=lambda x: x[1], reverse=True)
+    return [index for index, _ in scored] + list(candidates[len(scores):]), dict(scored)
+
+# Function to score MMR relevance over a pool. With nothing re-ranked this is the first-stage cosine.
+# Otherwise re-ranked candidates get min-max normalised cross-encoder scores in [0, 1] and the unscored
+# tail is placed below them in [-1, -0.5], keeping its cosine order, so the two scales never interleave.
+def mmr_relevance(pool, similarities, rerank_by_index):
+    if not any(i in rerank_by_index for i in pool):
+        return [similarities[i] for i in pool]
+
+    def scale(values):
+        low, high = min(values), max(values)
+        return [(v - low) / (high - low) if high > low else 1.0 for v in values]
+
+    scored = [i for i in pool if i in rerank_by_index]
+    unscored = [i for i in pool if i not in rerank_by_index]
+    relevance = dict(zip(scored, scale([rerank_by_index[i] for i in scored])))
+    if unscored:
+        relevance.update(zip(unscored, [-1.0 + 0.5 * v for v in scale([similarities[i] for i in unscored])]))
+    return [relevance[i] for i in pool]
+
+# Function to find relevant cases (Legalis) with most similar sections.
+# Stage one shortlists cluster representatives by bi-encoder cosine against the precomputed index,
+# stage two re-orders the shortlist (and each result's sections) with the cross-encoder.
+# In degraded mode both stages are replaced by lexical similarity and nothing is re-ranked.
+# Once the query is encoded, a missed deadline no longer fails the request: the remaining
+# re-ranking is skipped and the results are returned as degraded.
+# Returns (results, degraded).
+def find_relevant_cases(user_input, cases_data, num_results=5, diverse=False, deadline=None, degraded=False):
+    rerank_deadline = time.perf_counter() + rerank_budget_ms / 1000.0
+    if deadline is not None:
+        rerank_deadline = min(rerank_deadline, deadline)
+
+    if degraded:
+        query_vector = lexical_cases.transform([user_input])
+        representative_similarities = (lexical_representative_matrix @ query_vector.T).toarray().ravel()
+    else:
+        check_deadline(deadline)
+        input_vector = normalize_rows(encode_text(user_input, tokenizer_legalis, model_legalis))[0]
+        representative_similarities = representative_matrix @ input_vector
+
+    k = min(max(shortlist_size, num_results), len(representative_similarities))
+    top = np.argpartition(-representative_similarities, k - 1)[:k]
+    top = top[np.argsort(-representative_similarities[top])]
+    shortlist = [int(i) for i in representatives[top]]
+    similarities = dict(zip(shortlist, representative_similarities[top].tolist()))
+
+    out_of_time = deadline_passed(deadline)
+    case_scores = [] if degraded or out_of_time else rerank_scores(user_input, [cases_data[i]["case_description"] for i in shortlist], rerank_deadline)
+    ordered, rerank_by_index = rerank_order(shortlist, case_scores)
+    if diverse:
+        # Redundancy is measured in the same space as relevance: BERT embeddings normally, TF-IDF when degraded
+        pool = ordered[:max(mmr_pool_size, num_results)]
+        vectors = lexical_cases.transform([cases_data[i]["case_description"] for i in pool]) if degraded else case_matrix[pool]
+        top_indices = mmr_select(pool, mmr_relevance(pool, similarities, rerank_by_index), vectors, num_results, mmr_lambda)
+    else:
+        top_indices = ordered[:num_results]
+
     results = []
     for index in top_indices:
+        out_of_time = out_of_time or deadline_passed(deadline)
         case = cases_data[index]
         # Find most similar sections for the case
-        case_sections = case["sections"]
-        section_similarities = []
+        section_ids = case["section_ids"]
+        if not section_ids:
+            section_similarities = np.empty(0)
+        elif degraded:
+            section_similarities = (lexical_section_matrix[section_ids] @ query_vector.T).toarray().ravel()
+        else:
+            section_similarities = section_matrix[section_ids] @ input_vector
+        section_order = list(np.argsort(-section_similarities))
+        if not degraded and not out_of_time:
+            section_scores = rerank_scores(user_input, [section_table[section_ids[i]]["section_description"] for i in section_order], rerank_deadline)
+            section_order, _ = rerank_order(section_order, section_scores)
 
-        for section in case_sections:
-            section_vector = encode_text(section["section_description"], tokenizer_legalis, model_legalis)
-            section_similarity = cosine_similarity(input_vector, section_vector.reshape(1, -1))[0][0]
-            section_similarities.append((section, section_similarity))
-        
-        # Sort sections by similarity and pick top N similar sections
-        sorted_sections = sorted(section_similarities, key=lambda x: x[1], reverse=True)[:3]
+        # Pick top N similar sections
+        sorted_sections = section_order[:3]
 
-        results.append({
+        result = {
             "case_id": case["case_id"],
             "case_title": case["case_title"],
             "case_link": case["case_link"],
             "similarity_score": float(similarities[index]),
-            "sections": [section[0] for section in sorted_sections],  # Include most similar sections
+            "sections": [section_table[section_ids[i]] for i in sorted_sections],  # Include most similar sections
             "strong_points": case["strong_points"],
-            "weak_points": case["weak_points"]
-        })
+            "weak_points": case["weak_points"],
+            # Near-duplicate cases folded into this result at index build time
+            "duplicate_case_ids": [cases_data[m]["case_id"] for m in cluster_members[case_clusters[index]] if m != index]
+        }
+        if index in rerank_by_index:
+            result["rerank_score"] = float(rerank_by_index[index])
+        results.append(result)
 
-    return results
+    return results, degraded or out_of_time
 
-# Function to find relevant FAQs (FAQ Model)
-def find_relevant_faq(query, faq_data, num_results=5):
-    faq_prompts = [faq["prompt"] for faq in faq_data]
-    faq_embeddings = np.array([encode_text(prompt, tokenizer_faq, model_faq) for prompt in faq_prompts])
-    
-    query_embedding = encode_text(query, tokenizer_faq, model_faq)
-    
-    similarities = [cosine_similarity(query_embedding.reshape(1, -1), faq_embedding.reshape(1, -1))[0][0] for faq_embedding in faq_embeddings]
-    
+# Function to turn FAQ similarity scores into the top results
+def top_faqs(similarities, faq_data, num_results=5):
     top_indices = np.argsort(similarities)[-num_results:][::-1]
-    
+
     results = []
     for index in top_indices:
         faq = faq_data[index]
@@ -113,46 +369,137 @@ def find_relevant_faq(query, faq_data, num_results=5):
             "faq_completion": faq["completion"],
             "similarity_score": float(similarities[index])
         })
-    
+
+    return results
+
+# Function to find relevant FAQs (FAQ Model), answering paraphrases of recent queries from the semantic cache.
+# In degraded mode the query is matched lexically and not encoded at all.
+def find_relevant_faq(query, faq_data, num_results=5, deadline=None, degraded=False):
+    if degraded:
+        query_vector = lexical_faq.transform([query])
+        return top_faqs((lexical_faq_matrix @ query_vector.T).toarray().ravel(), faq_data, num_results)
+
+    check_deadline(deadline)
+    query_embedding = normalize_rows(encode_text(query, tokenizer_faq, model_faq))[0]
+
+    cached, _ = faq_cache.lookup(query_embedding, num_results)
+    if cached is not None:
+        # Re-run a sample of hits against the corpus so the false-hit rate can guide the threshold
+        if random.random() < faq_cache_audit_rate:
+            fresh = top_faqs(faq_matrix @ query_embedding, faq_data, num_results)
+            faq_cache.record_audit(fresh[0]["faq_prompt"] != cached[0]["faq_prompt"])
+        return cached
+
+    results = top_faqs(faq_matrix @ query_embedding, faq_data, num_results)
+    faq_cache.store(query_embedding, query, num_results, results)
     return results
 
+# Admission control state: model work runs in the thread pool, at most max_concurrency at a time,
+# with up to max_queue requests waiting for a slot. Everything else is rejected straight away.
+# admitted_requests counts both and is the only thing the admission check reads, so it is checked
+# and bumped before the first await and a burst arriving in one event-loop tick cannot overshoot.
+worker_slots = asyncio.Semaphore(max_concurrency)
+admitted_requests = 0
+waiting_requests = 0
+active_requests = 0
+recent_latencies = deque(maxlen=latency_window)
+degraded_mode = False
+
+# Function to record a finished (or timed out) request's latency and switch degraded mode on or off.
+# Degraded mode ends once p95 falls below 80% of the threshold, so it does not flap.
+def record_latency(seconds):
+    global degraded_mode
+    recent_latencies.append(seconds)
+    if len(recent_latencies) < min(20, latency_window):
+        return
+    p95_ms = float(np.percentile(recent_latencies, 95)) * 1000
+    if not degraded_mode and p95_ms > degrade_p95_ms:
+        degraded_mode = True
+        logger.warning(f"p95 latency {p95_ms:.0f} ms is above {degrade_p95_ms:.0f} ms, switching to degraded mode.")
+    elif degraded_mode and p95_ms < 0.8 * degrade_p95_ms:
+        degraded_mode = False
+        logger.info(f"p95 latency {p95_ms:.0f} ms has recovered, leaving degraded mode.")
+
 # Root endpoint for checking if the API is up
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the Legalis AI API!"}
 
+# Semantic FAQ cache metrics, used to tune LEGALIS_FAQ_CACHE_THRESHOLD
+@app.get("/cache/stats")
+async def cache_stats():
+    return faq_cache.stats()
+
+# Admission control metrics
+@app.get("/load/stats")
+async def load_stats():
+    return {
+        "active": active_requests,
+        "waiting": waiting_requests,
+        "max_concurrency": max_concurrency,
+        "max_queue": max_queue,
+        "p95_ms": float(np.percentile(recent_latencies, 95)) * 1000 if recent_latencies else None,
+        "degraded": degraded_mode
+    }
+
 # Prediction endpoint (POST)
 @app.post("/predict/")
 async def predict(request: TextRequest):
+    global admitted_requests, waiting_requests, active_requests
+    arrived = time.perf_counter()
+    deadline = arrived + request_timeout_ms / 1000.0
+
+    # Input validation
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Text cannot be empty.")
+    if request.model_choice == "legalis" and not cases_data:
+        raise HTTPException(status_code=404, detail="No legal cases available.")
+    if request.model_choice == "faq" and not faq_data:
+        raise HTTPException(status_code=404, detail="No FAQs available.")
+
+    # Admission control: reject at once when every slot and queue place is taken,
+    # otherwise wait for a slot until the deadline
+    if admitted_requests >= max_concurrency + max_queue:
+        raise HTTPException(status_code=429, detail="Server is busy, please retry shortly.", headers={"Retry-After": "1"})
+    admitted_requests += 1
     try:
-        # Input validation
-        if not request.text.strip():
-            raise HTTPException(status_code=400, detail="Text cannot be empty.")
-
-        if request.model_choice == "legalis":
-            if not cases_data:
-                raise HTTPException(status_code=404, detail="No legal cases available.")
-            result = find_relevant_cases(request.text, cases_data)
-            if result:
-                return {"model": "Legalis", "results": result}
-            else:
-                raise HTTPException(status_code=404, detail="No relevant cases found.")
-
-        elif request.model_choice == "faq":
-            if not faq_data:
-                raise HTTPException(status_code=404, detail="No FAQs available.")
-            result = find_relevant_faq(request.text, faq_data)
-            if result:
-                return {"model": "FAQ", "results": result}
+        waiting_requests += 1
+        try:
+            await asyncio.wait_for(worker_slots.acquire(), timeout=max(deadline - time.perf_counter(), 0))
+        except asyncio.TimeoutError:
+            record_latency(time.perf_counter() - arrived)
+            raise HTTPException(status_code=503, detail="Timed out waiting for capacity.", headers={"Retry-After": "1"})
+        finally:
+            waiting_requests -= 1
+
+        degraded = degraded_mode
+        active_requests += 1
+        try:
+            if request.model_choice == "legalis":
+                result, degraded = await run_in_threadpool(find_relevant_cases, request.text, cases_data, diverse=request.diverse, deadline=deadline, degraded=degraded)
             else:
-                raise HTTPException(status_code=404, detail="No relevant FAQs found.")
-        
-        else:
-            raise HTTPException(status_code=400, detail="Invalid model_choice. Please choose either 'legalis' or 'faq'.")
+                result = await run_in_threadpool(find_relevant_faq, request.text, faq_data, deadline=deadline, degraded=degraded)
+        except DeadlineExceeded:
+            record_latency(time.perf_counter() - arrived)
+            raise HTTPException(status_code=503, detail="Request deadline exceeded.", headers={"Retry-After": "1"})
+        except Exception as e:
+            logger.error(f"Error processing request: {e}")
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+        finally:
+            active_requests -= 1
+            worker_slots.release()
+    finally:
+        admitted_requests -= 1
+    record_latency(time.perf_counter() - arrived)
+
+    if request.model_choice == "legalis":
+        if result:
+            return {"model": "Legalis", "results": result, "degraded": degraded}
+        raise HTTPException(status_code=404, detail="No relevant cases found.")
 
-    except Exception as e:
-        logger.error(f"Error processing request: {e}")
-        raise HTTPException(status_code=500, detail="Internal Server Error")
+    if result:
+        return {"model": "FAQ", "results": result, "degraded": degraded}
+    raise HTTPException(status_code=404, detail="No relevant FAQs found.")
 
 # Testing Locally Command (for reference)
 # curl -X POST "http://127.0.0.1:8000/predict/" -H "Content-Type: application/json" -d "{\"text\": \"What is the procedure for property registration?\", \"model_choice\": \"legalis\"}"
@@ -0,0 +1,158 @@
+import os
+import json
+import random
+import logging
+import argparse
+import torch
+from transformers import BertConfig, BertModel, BertForSequenceClassification, BertTokenizerFast
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Generates a stand-in for the proprietary checkpoints and dataset so the API can be load-tested:
+#   <output>/legalis_model, <output>/faq_model   tiny randomly-initialised BERT encoders
+#   <output>/reranker_model                      tiny cross-encoder (only with --reranker)
+#   <output>/Data/finalcases.json, QandA.jsonl   synthetic corpus with the real schema
+# Scores are meaningless; only the shapes and the amount of work per request are realistic.
+# Point the API at it with the variables from standin_env(), see loadtest.py.
+
+# Vocabulary used for synthetic text (and therefore the stand-in tokenizer)
+base_words = [
+    "property", "registration", "sale", "deed", "lease", "tenant", "landlord", "rent", "possession",
+    "title", "mortgage", "bank", "loan", "builder", "flat", "apartment", "society", "housing", "plot",
+    "land", "agricultural", "conversion", "mutation", "record", "stamp", "duty", "partition", "family",
+    "inheritance", "will", "succession", "gift", "power", "attorney", "agreement", "specific", "performance",
+    "injunction", "eviction", "encroachment", "boundary", "dispute", "court", "appeal", "tribunal", "order",
+    "decree", "suit", "plaintiff", "defendant", "petitioner", "respondent", "maharashtra", "mumbai", "pune",
+    "municipal", "corporation", "permission", "occupancy", "certificate", "delay", "refund", "interest",
+    "compensation", "consumer", "forum", "rera", "promoter", "allottee", "carpet", "area", "parking",
+    "maintenance", "charges", "transfer", "fee", "redevelopment", "tenancy", "act", "section", "clause",
+    "limitation", "period", "notice", "breach", "fraud", "forgery", "document", "evidence", "witness",
+    "how", "what", "when", "can", "i", "do", "the", "a", "of", "for", "to", "in", "my", "is", "on", "with"
+]
+# Compound terms widen the vocabulary to ~2000 tokens, so texts have room to differ
+words = base_words + [a + b for a in base_words[:45] for b in base_words[:45] if a != b]
+
+# A randomly-initialised encoder knows nothing about meaning, so mean-pooled embeddings only differ
+# when the token mix differs. Each synthetic text therefore draws from its own small topic of words;
+# drawing everything from the full vocabulary makes every long text average to the same vector.
+topic_size = 20
+
+# Function to pick the words one synthetic text is written with
+def random_topic(rng):
+    return rng.sample(words, topic_size)
+
+# Function to make a random sentence, from the given topic or a fresh one
+def random_text(rng, min_words=8, max_words=40, topic=None):
+    topic = topic or random_topic(rng)
+    return " ".join(rng.choice(topic) for _ in range(rng.randint(min_words, max_words)))
+
+# Function to generate a synthetic case corpus. A share of cases are light paraphrases of earlier
+# ones and sections are drawn from a shared pool, mirroring the redundancy of finalcases.json.
+def make_cases(rng, num_cases, num_sections, duplicate_rate=0.2):
+    section_pool = [
+        {
+            "section_id": f"S{i}",
+            "section_title": random_text(rng, 3, 6).title(),
+            "section_description": random_text(rng, 30, 120)
+        }
+        for i in range(num_sections)
+    ]
+    cases = []
+    for i in range(num_cases):
+        if cases and rng.random() < duplicate_rate:
+            original = rng.choice(cases)
+            description = original["case_description"] + " " + rng.choice(words)
+            sections = list(original["sections"])
+        else:
+            description = random_text(rng, 80, 300)
+            sections = rng.sample(section_pool, rng.randint(1, min(6, num_sections)))
+        cases.append({
+            "case_id": f"C{i}",
+            "case_title": random_text(rng, 4, 10).title(),
+            "case_link": f"https://example.org/cases/C{i}.pdf",
+            "case_description": description,
+            "sections": sections,
+            "strong_points": [random_text(rng, 6, 15) for _ in range(rng.randint(2, 6))],
+            "weak_points": [random_text(rng, 6, 15) for _ in range(rng.randint(2, 6))]
+        })
+    return cases
+
+# Function to generate synthetic FAQ prompt/completion pairs
+def make_faqs(rng, num_faqs):
+    return [{"prompt": random_text(rng, 6, 20) + "?", "completion": random_text(rng, 20, 80)} for _ in range(num_faqs)]
+
+# Function to save a tokenizer over the synthetic vocabulary
+def save_tokenizer(path):
+    os.makedirs(path, exist_ok=True)
+    vocab_file = os.path.join(path, "vocab.txt")
+    with open(vocab_file, 'w', encoding='utf-8') as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words) + "\n")
+    # Load from the directory rather than passing vocab_file, which newer transformers ignores
+    BertTokenizerFast.from_pretrained(path).save_pretrained(path)
+
+# Function to save a tiny randomly-initialised BERT (encoder or single-logit cross-encoder).
+# Position and segment embeddings are zeroed: they are identical for every text of a given length
+# and would otherwise dominate the mean-pooled vector, pulling all embeddings together.
+def save_model(path, hidden_size, num_layers, cross_encoder=False):
+    config = BertConfig(
+        vocab_size=len(words) + 5,
+        hidden_size=hidden_size,
+        num_hidden_layers=num_layers,
+        num_attention_heads=max(1, hidden_size // 64),
+        intermediate_size=hidden_size * 4,
+        max_position_embeddings=512,
+        num_labels=1
+    )
+    model = BertForSequenceClassification(config) if cross_encoder else BertModel(config)
+    embeddings = model.bert.embeddings if cross_encoder else model.embeddings
+    with torch.no_grad():
+        embeddings.position_embeddings.weight.zero_()
+        embeddings.token_type_embeddings.weight.zero_()
+    model.save_pretrained(path)
+    save_tokenizer(path)
+
+# Function to return the environment variables that point the API at a generated stand-in
+def standin_env(output):
+    output = os.path.abspath(output)
+    return {
+        "LEGALIS_MODEL_PATH": os.path.join(output, "legalis_model"),
+        "FAQ_MODEL_PATH": os.path.join(output, "faq_model"),
+        "LEGALIS_RERANKER_PATH": os.path.join(output, "reranker_model"),
+        "LEGALIS_CASES_PATH": os.path.join(output, "Data", "finalcases.json"),
+        "FAQ_DATA_PATH": os.path.join(output, "Data", "QandA.jsonl"),
+        "LEGALIS_INDEX_PATH": os.path.join(output, "Data", "legalis_index")
+    }
+
+# Function to generate synthetic user queries for the load generator
+def make_queries(rng, count):
+    return [random_text(rng, 5, 30) for _ in range(count)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a tiny random BERT stand-in and synthetic corpus for load tests.")
+    parser.add_argument("--output", default="../standin")
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--sections", type=int, default=300)
+    parser.add_argument("--faqs", type=int, default=1000)
+    parser.add_argument("--hidden-size", type=int, default=128)
+    parser.add_argument("--layers", type=int, default=2)
+    parser.add_argument("--reranker", action="store_true", help="also generate a cross-encoder stand-in")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    data_dir = os.path.join(args.output, "Data")
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, "finalcases.json"), 'w', encoding='utf-8') as f:
+        json.dump(make_cases(rng, args.cases, args.sections), f)
+    with open(os.path.join(data_dir, "QandA.jsonl"), 'w', encoding='utf-8') as f:
+        for faq in make_faqs(rng, args.faqs):
+            f.write(json.dumps(faq) + "\n")
+
+    save_model(os.path.join(args.output, "legalis_model"), args.hidden_size, args.layers)
+    save_model(os.path.join(args.output, "faq_model"), args.hidden_size, args.layers)
+    if args.reranker:
+        save_model(os.path.join(args.output, "reranker_model"), args.hidden_size, args.layers, cross_encoder=True)
+
+    logger.info(f"Stand-in written to {args.output}")
@@ -0,0 +1,57 @@
+import os
+import json
+import time
+import random
+import asyncio
+import importlib
+import pytest
+
+pytest.importorskip("torch")
+httpx = pytest.importorskip("httpx")
+
+import make_standin
+
+
+# Build a tiny stand-in once and import the API against it
+@pytest.fixture(scope="module")
+def main(tmp_path_factory):
+    output = tmp_path_factory.mktemp("standin")
+    rng = random.Random(0)
+    data_dir = output / "Data"
+    data_dir.mkdir()
+    (data_dir / "finalcases.json").write_text(json.dumps(make_standin.make_cases(rng, 20, 10)))
+    (data_dir / "QandA.jsonl").write_text("".join(json.dumps(faq) + "\n" for faq in make_standin.make_faqs(rng, 20)))
+    make_standin.save_model(str(output / "legalis_model"), 32, 1)
+    make_standin.save_model(str(output / "faq_model"), 32, 1)
+    os.environ.update(make_standin.standin_env(str(output)))
+    return importlib.import_module("main")
+
+
+# Function to stand in for FAQ search: holds its slot long enough for a burst to pile up
+def slow_faq(query, faq_data, num_results=5, deadline=None, degraded=False):
+    time.sleep(0.3)
+    return [{"faq_prompt": query, "faq_completion": "", "similarity_score": 1.0}]
+
+
+async def send_burst(app, count):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(
+            client.post("/predict/", json={"text": f"query {i}", "model_choice": "faq"}) for i in range(count)
+        ))
+
+
+def test_burst_beyond_queue_is_rejected_at_once(main, monkeypatch):
+    monkeypatch.setattr(main, "max_concurrency", 1)
+    monkeypatch.setattr(main, "max_queue", 2)
+    monkeypatch.setattr(main, "worker_slots", asyncio.Semaphore(1))
+    monkeypatch.setattr(main, "find_relevant_faq", slow_faq)
+
+    responses = asyncio.run(send_burst(main.app, 6))
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200, 200, 200, 429, 429, 429]
+    assert all(response.headers["Retry-After"] == "1" for response in responses if response.status_code == 429)
+    assert main.admitted_requests == 0
+    assert main.waiting_requests == 0
+    assert main.active_requests == 0
@@ -0,0 +1,73 @@
+import os
+import random
+import logging
+import argparse
+import jsonlines
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fine-tunes InLegalBERT into the cross-encoder used for re-ranking (LEGALIS_RERANKER_PATH).
+# Training data is JSONL with one labelled pair per line:
+#   {"query": "...", "passage": "<case or section description>", "label": 1}
+# label is 1 for relevant and 0 for not relevant (values in between are allowed).
+# Good negatives are cases/sections the bi-encoder ranks highly but that are not relevant.
+#
+#   python train_reranker.py --pairs ../Data/rerank_pairs.jsonl --output ../reranker_model
+
+base_model = "law-ai/InLegalBERT"
+reranker_model_path = os.getenv("LEGALIS_RERANKER_PATH", "../reranker_model")
+
+# Function to load labelled (query, passage, label) pairs
+def load_pairs(path):
+    with jsonlines.open(path) as reader:
+        return [(obj["query"], obj["passage"], float(obj["label"])) for obj in reader]
+
+# Function to fine-tune a single-logit cross-encoder with binary cross-entropy
+def train(pairs, base, epochs, batch_size, learning_rate, seed):
+    random.seed(seed)
+    torch.manual_seed(seed)
+    tokenizer = AutoTokenizer.from_pretrained(base)
+    model = AutoModelForSequenceClassification.from_pretrained(base, num_labels=1)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=learning_rate)
+    loss_fn = torch.nn.BCEWithLogitsLoss()
+
+    model.train()
+    for epoch in range(epochs):
+        random.shuffle(pairs)
+        total = 0.0
+        for start in range(0, len(pairs), batch_size):
+            queries, passages, labels = zip(*pairs[start:start + batch_size])
+            inputs = tokenizer(list(queries), list(passages), return_tensors="pt", truncation=True, padding=True, max_length=512)
+            logits = model(**inputs).logits[:, 0]
+            loss = loss_fn(logits, torch.tensor(labels))
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(labels)
+        logger.info(f"Epoch {epoch + 1}/{epochs}: loss {total / len(pairs):.4f}")
+
+    model.eval()
+    return tokenizer, model
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fine-tune InLegalBERT as a (query, passage) cross-encoder re-ranker.")
+    parser.add_argument("--pairs", required=True, help="JSONL of {query, passage, label}")
+    parser.add_argument("--base", default=base_model)
+    parser.add_argument("--output", default=reranker_model_path)
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--learning-rate", type=float, default=2e-5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pairs = load_pairs(args.pairs)
+    if not pairs:
+        raise SystemExit("No training pairs found.")
+    tokenizer, model = train(pairs, args.base, args.epochs, args.batch_size, args.learning_rate, args.seed)
+    model.save_pretrained(args.output)
+    tokenizer.save_pretrained(args.output)
+    logger.info(f"Re-ranker written to {args.output}")